@@ -8,21 +8,24 @@ st.set_page_config(
 )
 
 # Panel de navegación superior
-pages = {
-    "Inicio": [st.Page("inicio.py", title="Inicio")],
-    "Índices": [
-        st.Page("iet.py", title="Índice de Equilibrio Territorial (IET)"),
-        st.Page("ipmi.py", title="Índice de Presión Marina Integrado (IPMI) - Pronto")
-    ],
-    "Recursos": [
-        st.Page("mapas.py", title="Mapas"),
-        st.Page("graficos.py", title="Gráficos"),
-        st.Page("vid-int.py", title="Videos Interactivos"),
-        st.Page("references.py", title="Referencias")
-    ],
-    "Sobre nosotros": [st.Page("about.py", title="Sobre nosotros")]
-}
+# Las páginas se crean una vez por sesión y se reutilizan en cada ejecución.
+# No se comparten entre sesiones (st.cache_resource) porque st.Page guarda estado de la página seleccionada.
+if "pages" not in st.session_state:
+    st.session_state.pages = {
+        "Inicio": [st.Page("inicio.py", title="Inicio")],
+        "Índices": [
+            st.Page("iet.py", title="Índice de Equilibrio Territorial (IET)"),
+            st.Page("ipmi.py", title="Índice de Presión Marina Integrado (IPMI) - Pronto")
+        ],
+        "Recursos": [
+            st.Page("mapas.py", title="Mapas"),
+            st.Page("graficos.py", title="Gráficos"),
+            st.Page("vid-int.py", title="Videos Interactivos"),
+            st.Page("references.py", title="Referencias")
+        ],
+        "Sobre nosotros": [st.Page("about.py", title="Sobre nosotros")]
+    }
 
 # Crear el panel de navegación
-pg = st.navigation(pages, position="top")
+pg = st.navigation(st.session_state.pages, position="top")
 pg.run()
\ No newline at end of file
@@ -1,162 +1,202 @@
 import streamlit as st
 import pandas as pd
-import csv
+import numpy as np
+import io
 from pathlib import Path
 
+from series_dtypes import reduce_dtypes
+
+
+# Carpeta con las series temporales consolidadas
+DATA_DIR = Path(__file__).parent / "time-series_data"
+
+
+# A partir de este tamaño, los CSV se leen solo en la ventana de años pedida (ver load_range)
+CHUNK_THRESHOLD = 8 * 1024 * 1024
+
+
+# Leer una serie una sola vez por archivo; la fecha de modificación invalida la caché si el archivo cambia
+# Se guarda con cache_resource para no copiar el DataFrame en cada acceso: es compartido y NO debe modificarse
+@st.cache_resource(show_spinner=False)
+def load_data(path: str, mtime: float) -> pd.DataFrame:
+    # Los Parquet generados por tools/convert_csvs.py ya guardan los tipos reducidos
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return reduce_dtypes(pd.read_csv(path))
+
+
+# Leer de un CSV ordenado por año solo las filas con año en [y0, y1]
+# Se buscan por bisección los bytes donde empieza y termina la ventana, así la lectura es O(ventana) y no O(archivo)
+def load_range(path, year_col, y0, y1):
+    with open(path, "rb") as csvfile:
+        header = csvfile.readline()
+        start = csvfile.tell()
+        end = csvfile.seek(0, 2)
+
+        # Inicio de la primera línea con año válido que empieza en pos o después, y su año (None al final del archivo)
+        # Las líneas sin año (vacías, cortas o con la celda vacía) se saltan, igual que las descarta reduce_dtypes
+        def line_at(pos):
+            csvfile.seek(pos - 1)
+            csvfile.readline()
+            while True:
+                line_start = csvfile.tell()
+                line = csvfile.readline()
+                if not line:
+                    return line_start, None
+                try:
+                    return line_start, int(float(line.split(b",")[year_col]))
+                except (IndexError, ValueError):
+                    continue
+
+        # Primer byte cuya línea tiene año >= year (o el final del archivo)
+        def offset_of(year):
+            lo, hi = start, end
+            while lo < hi:
+                mid = (lo + hi) // 2
+                line_year = line_at(mid)[1]
+                if line_year is None or line_year >= year:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            return line_at(lo)[0]
+
+        first, last = offset_of(y0), offset_of(y1 + 1)
+        csvfile.seek(first)
+        window = csvfile.read(last - first)
+    return reduce_dtypes(pd.read_csv(io.BytesIO(header + window)))
+
+
+# Usar la versión Parquet de un CSV si existe y no es más vieja que el CSV; si no, el CSV original
+# (así un CSV editado se muestra aunque todavía no se haya vuelto a ejecutar tools/convert_csvs.py)
+def data_file(name):
+    file = DATA_DIR / name
+    parquet = file.with_suffix(".parquet")
+    if parquet.exists() and (not file.exists() or parquet.stat().st_mtime >= file.stat().st_mtime):
+        return parquet
+    return file
+
+
+# Configuración de cada gráfico: archivo, columna de años, series y eje Y
+# series: (índice de columna, nombre de la serie, texto de la casilla y clave; None si la serie siempre se muestra)
+CHARTS = {
+    "Pérdida de Vegetación": {
+        "title": "Pérdida de Vegetación en Argentina",
+        "file": "vegetation_loss_completo_1985_2024.csv",
+        "year_col": 2,
+        "series": [
+            (0, "Pérdida de Vegetación Primaria", ("Pérdida de vegetación primaria", "veg_loss_primary")),
+            (1, "Pérdida de Vegetación Secundaria", ("Pérdida de vegetación secundaria", "veg_loss_secondary"))
+        ],
+        "y_label": "Pérdida de Vegetación (%)"
+    },
+    "Vegetación secundaria": {
+        "title": "Vegetación Secundaria en Argentina",
+        "file": "secondary_vegetation_completo_1985_2024.csv",
+        "year_col": 2,
+        "series": [
+            (0, "Consolidación de Vegetación Secundaria", ("Consolidación de vegetación secundaria", "consolidated_veg")),
+            (1, "Recuperación de Vegetación Secundaria", ("Recuperación de vegetación secundaria", "recovering_veg"))
+        ],
+        "y_label": "Vegetación Secundaria (%)"
+    },
+    "Cobertura de suelo": {
+        "title": "Cobertura de Suelo en Argentina",
+        "file": "coverage_completo_1985_2024.csv",
+        "year_col": 6,
+        "series": [
+            (0, "Vegetación Natural", None),
+            (1, "Bosques", None),
+            (2, "Agricultura", None),
+            (3, "No Vegetación", None),
+            (4, "Agua", None),
+            (5, "Sin Datos", None)
+        ],
+        "y_label": "Cobertura de Suelo (%)"
+    }
+}
+
+
+# Recortar por años y armar el DataFrame a graficar; se memoriza por archivo, rango de años y series visibles
+# series: tuplas (índice de columna, nombre de la serie, visible); las series ocultas se muestran en cero
+@st.cache_data(max_entries=256, show_spinner=False)
+def build_plot_df(path: str, mtime: float, year_col: int, series: tuple, y0: int, y1: int) -> pd.DataFrame:
+    # Los CSV grandes se leen solo en el rango de años; el resto se carga completo desde la caché
+    if path.endswith(".csv") and Path(path).stat().st_size > CHUNK_THRESHOLD:
+        data = load_range(path, year_col, y0, y1)
+    else:
+        data = load_data(path, mtime)
+    # Máscara sobre el arreglo de años: se toman solo las columnas necesarias, sin copiar el DataFrame ni usar set_index
+    years = data.iloc[:, year_col].to_numpy()
+    mask = (years >= y0) & (years <= y1)
+    # Columnas como arreglos float32 ya construidos (las ocultas en cero), para que pandas no infiera tipos ni copie
+    hidden = np.zeros(mask.sum(), dtype=np.float32)
+    return pd.DataFrame(
+        {label: data.iloc[:, column].to_numpy(dtype=np.float32, copy=False)[mask] if visible else hidden
+         for column, label, visible in series},
+        index=pd.Index(years[mask], name='Año'),
+        copy=False
+    )
+
+
+# Especificación Vega-Lite fija: en cada ejecución solo cambian los datos y el título del eje Y
+CHART_SPEC = {
+    "mark": {"type": "line", "tooltip": True},
+    "encoding": {
+        "x": {"field": "Año", "type": "ordinal", "title": "Año"},
+        "y": {"field": "value", "type": "quantitative"},
+        "color": {"field": "series", "type": "nominal", "title": None}
+    }
+}
+
+
+# Graficar un DataFrame indexado por año con la especificación precalculada
+def line_chart(df, y_label):
+    long_df = df.reset_index().melt(id_vars="Año", var_name="series", value_name="value")
+    encoding = {**CHART_SPEC["encoding"], "y": {**CHART_SPEC["encoding"]["y"], "title": y_label}}
+    # El DataFrame se pasa aparte para que Streamlit lo envíe como Arrow y no como registros JSON dentro de la especificación
+    st.vega_lite_chart(long_df, {**CHART_SPEC, "encoding": encoding}, use_container_width=True)
+
+
 # Título de la página de gráficos
 st.markdown('<h1 style="text-align: center;">Gráficos</h1>', unsafe_allow_html=True)
 
-# Selección de provincia
+# Selección del gráfico
 graph = st.selectbox("**Seleccione el gráfico que desea visualizar:**",
-                     ["Pérdida de Vegetación", "Vegetación secundaria", "Cobertura de suelo"], index=None, placeholder="Seleccione un gráfico")
+                     list(CHARTS), index=None, placeholder="Seleccione un gráfico")
 
-if graph == "Pérdida de Vegetación":
-    # Título del gráfico
-    st.markdown('<h2 style="text-align: center;">Pérdida de Vegetación en Argentina</h2>', unsafe_allow_html=True)
-
-    # Seleccionar las series a visualizar
-    st.markdown("**Seleccione las series que desea visualizar:**")
-    primary_loss = st.checkbox("Pérdida de vegetación primaria", value=True, key="veg_loss_primary")
-    secondary_loss = st.checkbox("Pérdida de vegetación secundaria", value=True, key="veg_loss_secondary")
 
-    # Rango de años
-    year_range = st.slider("**Seleccione el rango de años**", 1985, 2024, (2000, 2024), step=1)
-
-    # Cargar datos
-    file = Path(__file__).parent / "time-series_data" / "vegetation_loss_completo_1985_2024.csv"
-    data = []
-    with open(file, newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            data.append(row)
-
-    
-    # Definir ejes y valores: filtrar filas por el rango de años para asegurar listas de igual longitud
-    headers = data[0]
-    # Filtrar filas válidas dentro del rango seleccionado
-    filtered_rows = [row for row in data[1:] if row and len(row) > 2 and row[2].strip() and year_range[0] <= int(row[2]) <= year_range[1]]
-    years = [int(row[2]) for row in filtered_rows]
-
-    if primary_loss and secondary_loss:
-        primary_loss_values = [float(row[0]) for row in filtered_rows]
-        secondary_loss_values = [float(row[1]) for row in filtered_rows]
-    elif primary_loss:
-        primary_loss_values = [float(row[0]) for row in filtered_rows]
-        secondary_loss_values = [0.0] * len(years)
-    elif secondary_loss:
-        primary_loss_values = [0.0] * len(years)
-        secondary_loss_values = [float(row[1]) for row in filtered_rows]
-    else:
-        # Ninguna serie seleccionada: mostrar ceros para evitar errores
-        primary_loss_values = [0.0] * len(years)
-        secondary_loss_values = [0.0] * len(years)
-
-    # Crear un DataFrame para graficar
-    df = pd.DataFrame({
-        'Año': years,
-        'Pérdida de Vegetación Primaria': primary_loss_values,
-        'Pérdida de Vegetación Secundaria': secondary_loss_values
-
-    }).set_index('Año')
-    
-    # Mostrar el gráfico con nombres en los ejes o informar si no hay datos
-    if df.empty:
-        st.info("No hay datos para el rango de años seleccionado.")
-    else:
-        st.line_chart(df, x_label='Año', y_label='Pérdida de Vegetación (%)')
+# Widgets y gráfico en un fragmento: cambiar series o años solo vuelve a ejecutar esta sección
+@st.fragment
+def render_chart(graph):
+    cfg = CHARTS[graph]
 
-elif graph == "Vegetación secundaria":
     # Título del gráfico
-    st.markdown('<h2 style="text-align: center;">Vegetación Secundaria en Argentina</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 style="text-align: center;">{cfg["title"]}</h2>', unsafe_allow_html=True)
 
-    # Seleccionar las series a visualizar
-    st.markdown("**Seleccione las series que desea visualizar:**")
-    consolidated_veg = st.checkbox("Consolidación de vegetación secundaria", value=True, key="consolidated_veg")
-    recovering_veg = st.checkbox("Recuperación de vegetación secundaria", value=True, key="recovering_veg")
+    # Seleccionar las series a visualizar (solo las que tienen casilla)
+    visible = {}
+    if any(checkbox for _, _, checkbox in cfg["series"]):
+        st.markdown("**Seleccione las series que desea visualizar:**")
+    for column, label, checkbox in cfg["series"]:
+        visible[column] = st.checkbox(checkbox[0], value=True, key=checkbox[1]) if checkbox else True
 
     # Rango de años
     year_range = st.slider("**Seleccione el rango de años**", 1985, 2024, (2000, 2024), step=1)
 
-    # Cargar datos
-    file = Path(__file__).parent / "time-series_data" / "secondary_vegetation_completo_1985_2024.csv"
-    data = []
-    with open(file, newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            data.append(row)
-
-    
-    # Definir ejes y valores: filtrar filas por el rango de años para asegurar listas de igual longitud
-    headers = data[0]
-    # Filtrar filas válidas dentro del rango seleccionado
-    filtered_rows = [row for row in data[1:] if row and len(row) > 2 and row[2].strip() and year_range[0] <= int(row[2]) <= year_range[1]]
-    years = [int(row[2]) for row in filtered_rows]
-
-    if consolidated_veg and recovering_veg:
-        consolidated_veg_values = [float(row[0]) for row in filtered_rows]
-        recovering_veg_values = [float(row[1]) for row in filtered_rows]
-    elif consolidated_veg:
-        consolidated_veg_values = [float(row[0]) for row in filtered_rows]
-        recovering_veg_values = [0.0] * len(years)
-    elif recovering_veg:
-        consolidated_veg_values = [0.0] * len(years)
-        recovering_veg_values = [float(row[1]) for row in filtered_rows]
-    else:
-        # Ninguna serie seleccionada: mostrar ceros para evitar errores
-        consolidated_veg_values = [0.0] * len(years)
-        recovering_veg_values = [0.0] * len(years)
+    # Archivo de datos
+    file = data_file(cfg["file"])
 
-    # Crear un DataFrame para graficar
-    df = pd.DataFrame({
-        'Año': years,
-        'Consolidación de Vegetación Secundaria': consolidated_veg_values,
-        'Recuperación de Vegetación Secundaria': recovering_veg_values
-    }).set_index('Año')
+    # Filtrar por años y crear un DataFrame para graficar
+    series = tuple((column, label, visible[column]) for column, label, _ in cfg["series"])
+    df = build_plot_df(str(file), file.stat().st_mtime, cfg["year_col"], series, *year_range)
 
     # Mostrar el gráfico con nombres en los ejes o informar si no hay datos
     if df.empty:
         st.info("No hay datos para el rango de años seleccionado.")
     else:
-        st.line_chart(df, x_label='Año', y_label='Vegetación Secundaria (%)')
+        line_chart(df, cfg["y_label"])
 
-elif graph == "Cobertura de suelo":
-    # Título del gráfico
-    st.markdown('<h2 style="text-align: center;">Cobertura de Suelo en Argentina</h2>', unsafe_allow_html=True)
 
-    # Rango de años
-    year_range = st.slider("**Seleccione el rango de años**", 1985, 2024, (2000, 2024), step=1)
-
-    # Cargar datos
-    file = Path(__file__).parent / "time-series_data" / "coverage_completo_1985_2024.csv"
-    data = []
-    with open(file, newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            data.append(row)
-    
-    # Definir ejes y valores: filtrar filas por el rango de años para asegurar listas de igual longitud
-    headers = data[0]
-    # Filtrar filas válidas dentro del rango seleccionado
-    filtered_rows = [row for row in data[1:] if row and len(row) > 4 and row[6].strip() and year_range[0] <= int(row[6]) <= year_range[1]]
-    years = [int(row[6]) for row in filtered_rows]
-    natural_veg_values = [float(row[0]) for row in filtered_rows]
-    forest_values = [float(row[1]) for row in filtered_rows]
-    agriculture_values = [float(row[2]) for row in filtered_rows]
-    non_veg_values = [float(row[3]) for row in filtered_rows]
-    water_values = [float(row[4]) for row in filtered_rows]
-    non_data_values = [float(row[5]) for row in filtered_rows]
-    # Crear un DataFrame para graficar
-    df = pd.DataFrame({
-        'Año': years,
-        'Vegetación Natural': natural_veg_values,
-        'Bosques': forest_values,
-        'Agricultura': agriculture_values,
-        'No Vegetación': non_veg_values,
-        'Agua': water_values,
-        'Sin Datos': non_data_values
-    }).set_index('Año')
-    # Mostrar el gráfico con nombres en los ejes o informar si no hay datos
-    if df.empty:
-        st.info("No hay datos para el rango de años seleccionado.")
-    else:
-        st.line_chart(df, x_label='Año', y_label='Cobertura de Suelo (%)')
\ No newline at end of file
+# Mostrar el gráfico seleccionado
+if graph:
+    render_chart(graph)
@@ -0,0 +1,74 @@
+"""
+Construcción en Earth Engine de la región y de la imagen de índices (NDMI, SAVI, EVI, NDBI e IET).
+Módulo sin Streamlit: lo usan mapas.py (con caché) y los scripts de tools/ que exportan a EE o Cloud Storage.
+"""
+import ee
+
+# Región y período analizados
+REGION_NAME = "Buenos Aires"
+START_DATE = "2023-01-01"
+END_DATE = "2023-12-31"
+
+# Bandas de la imagen combinada, en este orden (es también el orden de las bandas del COG exportado)
+COG_BANDS = ['NDMI', 'SAVI', 'EVI', 'NDBI', 'IET']
+
+# Valor para los píxeles enmascarados (fuera de la región o nubes) en las descargas y exportaciones
+NODATA = -9999
+
+
+# Región y su geometría: con un asset se lee directamente el polígono; si no, se filtra GAUL por nombre
+def region_collection(name, level=1, asset=None):
+    if asset:
+        region = ee.FeatureCollection(asset)
+    else:
+        region = ee.FeatureCollection(f"FAO/GAUL/2015/level{level}") \
+            .filter(ee.Filter.eq(f"ADM{level}_NAME", name))
+    return region, region.geometry()
+
+
+# Enmascarar sombras de nubes (3), nubes de probabilidad media y alta (8, 9) y cirros (10) con la banda SCL
+# de Sentinel-2; en la colección armonizada QA60 viene vacía desde 2022, así que no enmascaraba nada en 2023
+SCL_CLOUDS = [3, 8, 9, 10]
+
+
+def mask_s2_clouds(img):
+    scl = img.select('SCL')
+    return img.updateMask(scl.remap(SCL_CLOUDS, [0] * len(SCL_CLOUDS), 1))
+
+
+# Imagen con los cuatro índices y el IET sobre la mediana de Sentinel-2 del período, limitada a la región
+def build_combined(region, start, end):
+    # Colección armonizada: desde 2022 corrige el desplazamiento de +1000 en las reflectancias (S2_SR está obsoleta)
+    # y solo se usan imágenes con menos de 20 % de nubes; la mediana se pasa a float32 antes de calcular los índices
+    s2 = ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED") \
+        .filterBounds(region) \
+        .filterDate(start, end) \
+        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)) \
+        .map(mask_s2_clouds) \
+        .select(['B2', 'B4', 'B8', 'B11']) \
+        .median() \
+        .toFloat()
+
+    ndmi = s2.normalizedDifference(['B8', 'B11']).rename('NDMI')
+
+    savi = s2.expression(
+        '(1 + L) * ((NIR - RED) / (NIR + RED + L))',
+        {'NIR': s2.select('B8'), 'RED': s2.select('B4'), 'L': 0.5}
+    ).rename('SAVI')
+
+    evi = s2.expression(
+        '2.5 * ((NIR - RED) / (NIR + 6 * RED - 7.5 * BLUE + 1))',
+        {'NIR': s2.select('B8'), 'RED': s2.select('B4'), 'BLUE': s2.select('B2')}
+    ).rename('EVI')
+
+    ndbi = s2.normalizedDifference(['B11', 'B8']).rename('NDBI')
+
+    # Reunir los índices en una sola imagen multibanda y calcular el IET con una única expresión
+    indices = ee.Image.cat([ndmi, savi, evi, ndbi])
+    iet = indices.expression("(b('NDMI') + b('SAVI') + b('EVI')) / (b('NDBI') + 1)").rename('IET')
+
+    # Limitar a la región con una máscara rasterizada (paint) en lugar de clip: el enmascarado es por píxel
+    # y cada tesela se calcula en paralelo, sin intersecar la geometría en cada una
+    # Todas las bandas en float32 (las expresiones con constantes dan float64)
+    region_mask = ee.Image(0).paint(region, 1)
+    return indices.addBands(iet).toFloat().updateMask(region_mask)
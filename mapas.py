@@ -1,39 +1,40 @@
 import streamlit as st
+from importlib.util import find_spec
 
 # Comprobación de dependencias (muestra instrucciones si faltan)
+# Solo se busca si los paquetes están instalados, sin importarlos: geemap (y folium) se importan
+# dentro de build_map_html, únicamente cuando hay que construir un mapa que no está en caché
 missing = []
-try:
-    import ee
-except Exception:
+if find_spec("ee") is None:
     missing.append("earthengine-api (ee)")
 
-try:
-    import geemap.foliumap as geemap
-except Exception:
+if find_spec("geemap") is None:
     missing.append("geemap")
 
-try:
-    from streamlit_folium import st_folium
-except Exception:
-    # streamlit_folium es opcional; se usará fallback con components.html
-    st_folium = None
-
 if missing:
     st.set_page_config(page_title="Mapa IET Buenos Aires", layout="wide")
     st.title("🌍 Visualización de Índice IET - Buenos Aires 2023")
     st.error(
         "Faltan paquetes necesarios: " + ", ".join(missing) + ".\n\n"
         "Instálalos en tu entorno y autentica Earth Engine:\n\n"
-        "pip install earthengine-api geemap streamlit-folium\n\n"
+        "pip install earthengine-api geemap\n\n"
         "Luego ejecuta:\n\n"
         "earthengine authenticate\n\n"
         "Reinicia la aplicación después de instalar y autenticar."
     )
     st.stop()
 
+import ee
 import json
-import tempfile
-import os
+import math
+import time
+import streamlit.components.v1 as components
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from indices_ee import COG_BANDS, END_DATE, NODATA, REGION_NAME, START_DATE, build_combined, region_collection
 
 # Configuración de la página
 st.set_page_config(
@@ -46,12 +47,15 @@ st.set_page_config(
 st.title("🌍 Visualización de Índice IET - Buenos Aires 2023")
 
 # Inicializar Earth Engine para Streamlit Cloud
+@st.cache_resource(show_spinner=False)
 def initialize_ee():
     """
     Intenta inicializar EE con credenciales de servicio en st.secrets.
-    - Soporta clave JSON completa (dict o string) o clave privada PEM con newlines.
-    - Escribe la clave a un archivo temporal y pasa la ruta a ee.ServiceAccountCredentials,
-      luego borra el archivo temporal.
+    - Se ejecuta una vez por proceso (st.cache_resource); si falla, main() limpia la caché
+      para reintentar en la siguiente ejecución.
+    - Soporta clave JSON completa (tabla de secrets o string) o clave privada PEM con newlines.
+    - Pasa la clave en memoria a ee.ServiceAccountCredentials (key_data), que distingue JSON de PEM;
+      no se escribe ningún archivo temporal.
     - Si faltan secretos, cae en initialize_ee_interactive().
     """
     try:
@@ -61,53 +65,21 @@ def initialize_ee():
         # No hay secretos: intentar inicialización interactiva (local)
         return initialize_ee_interactive()
 
-    # Helper para escribir un objeto/str a archivo temporal
-    def _write_temp(content, suffix):
-        tmp = tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=suffix, encoding="utf-8")
-        tmp.write(content)
-        tmp.close()
-        return tmp.name
-
-    # Si la clave es un dict (ej. secrets devuelve dict), volcar a JSON
-    if isinstance(private_key, dict):
-        try:
-            key_path = _write_temp(json.dumps(private_key), ".json")
-            creds = ee.ServiceAccountCredentials(service_account, key_path)
-            ee.Initialize(creds)
-            os.remove(key_path)
-            return True
-        except Exception as e:
-            if os.path.exists(key_path):
-                os.remove(key_path)
-            st.error(f"Error inicializando EE con clave JSON: {e}")
-            return False
+    # Si la clave es una tabla (st.secrets devuelve un Mapping, no un dict), volcar a JSON
+    if isinstance(private_key, Mapping):
+        private_key = json.dumps(dict(private_key))
 
-    # Si la clave es string, intentar parsear como JSON; si falla, tratar como PEM
-    if isinstance(private_key, str):
-        # intentar JSON
-        try:
-            key_obj = json.loads(private_key)
-            key_path = _write_temp(json.dumps(key_obj), ".json")
-            creds = ee.ServiceAccountCredentials(service_account, key_path)
-            ee.Initialize(creds)
-            os.remove(key_path)
-            return True
-        except Exception:
-            # No es JSON: escribir el contenido tal cual (PEM) y pasar la ruta
-            try:
-                key_path = _write_temp(private_key, ".pem")
-                creds = ee.ServiceAccountCredentials(service_account, key_path)
-                ee.Initialize(creds)
-                os.remove(key_path)
-                return True
-            except Exception as e:
-                if os.path.exists(key_path):
-                    os.remove(key_path)
-                st.error(f"Error inicializando EE con clave PEM: {e}")
-                return False
+    # Si llega aquí sin un string, no se pudo usar el secreto; intentar modo interactivo
+    if not isinstance(private_key, str):
+        return initialize_ee_interactive()
 
-    # Si llega aquí, no se pudo usar el secreto; intentar modo interactivo
-    return initialize_ee_interactive()
+    try:
+        creds = ee.ServiceAccountCredentials(service_account, key_data=private_key)
+        ee.Initialize(creds)
+        return True
+    except Exception as e:
+        st.error(f"Error inicializando EE con la clave de servicio: {e}")
+        return False
 
 # Función alternativa para autenticación interactiva (backup)
 def initialize_ee_interactive():
@@ -122,145 +94,397 @@ def initialize_ee_interactive():
         except:
             return False
 
-# Función para obtener TODOS los datos del script original
-def get_all_data():
+# Asset de EE con el contorno ya filtrado (generado con tools/export_region_asset.py), desde la tabla
+# EE_REGION_ASSETS de st.secrets (nombre de la región -> assetId); None si no está configurado
+def get_region_asset(name: str):
     try:
-        region = ee.FeatureCollection("FAO/GAUL/2015/level1") \
-            .filter(ee.Filter.eq('ADM1_NAME', 'Buenos Aires'))
-
-        s2 = ee.ImageCollection("COPERNICUS/S2_SR") \
-            .filterBounds(region) \
-            .filterDate('2023-01-01', '2023-12-31') \
-            .select(['B2', 'B4', 'B8', 'B11']) \
-            .median()
-
-        ndmi = s2.normalizedDifference(['B8', 'B11']).rename('NDMI')
-
-        savi = s2.expression(
-            '(1 + L) * ((NIR - RED) / (NIR + RED + L))',
-            {'NIR': s2.select('B8'), 'RED': s2.select('B4'), 'L': 0.5}
-        ).rename('SAVI')
-
-        evi = s2.expression(
-            '2.5 * ((NIR - RED) / (NIR + 6 * RED - 7.5 * BLUE + 1))',
-            {'NIR': s2.select('B8'), 'RED': s2.select('B4'), 'BLUE': s2.select('B2')}
-        ).rename('EVI')
-
-        ndbi = s2.normalizedDifference(['B11', 'B8']).rename('NDBI')
-
-        iet = ndmi.add(savi).add(evi).divide(ndbi.add(1)).rename('IET')
-
-        return {
-            'iet': iet.clip(region),
-            'ndmi': ndmi.clip(region),
-            'savi': savi.clip(region),
-            'evi': evi.clip(region),
-            'ndbi': ndbi.clip(region),
-            'region': region
+        return st.secrets["EE_REGION_ASSETS"][name]
+    except Exception:
+        return None
+
+
+# Región y su geometría, construidas una vez y reutilizadas por get_all_data y get_layer_means
+@st.cache_resource(show_spinner=False)
+def get_region(name: str, level: int = 1, asset: str = None):
+    return region_collection(name, level, asset)
+
+
+# Imagen de índices (indices_ee.build_combined) y sus capas para la región y el período
+# Las imágenes de EE no se pueden serializar, por eso se guardan con cache_resource: el grafo
+# de cálculo se construye una vez por (región, fechas) y se reutiliza en cada interacción;
+# max_entries acota cuántas combinaciones de región y fechas quedan en memoria.
+# Los errores no se capturan aquí para que un fallo no quede guardado en la caché.
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_all_data(region_name: str, start: str, end: str):
+    region, geometry = get_region(region_name, asset=get_region_asset(region_name))
+
+    # Cada capa es una selección de banda sobre la misma imagen
+    combined = build_combined(region, start, end)
+
+    return {
+        'iet': combined.select('IET'),
+        'ndmi': combined.select('NDMI'),
+        'savi': combined.select('SAVI'),
+        'evi': combined.select('EVI'),
+        'ndbi': combined.select('NDBI'),
+        'combined': combined,
+        'region': region,
+        'geometry': geometry
+    }
+
+
+# Límites (xmin, ymin, xmax, ymax) de la región en las unidades de crs; solo cambian con la región
+@st.cache_data(show_spinner=False)
+def get_region_bounds(region_name: str, crs: str = 'EPSG:4326'):
+    _, geometry = get_region(region_name, asset=get_region_asset(region_name))
+    xs, ys = zip(*geometry.bounds(1, crs).coordinates().get(0).getInfo())
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+# Contorno de la región como GeoJSON, simplificado a ~100 m para que el HTML del mapa no crezca;
+# es estático, así que se pide a EE una sola vez
+@st.cache_data(show_spinner=False)
+def get_region_geojson(region_name: str, max_error: int = 100):
+    _, geometry = get_region(region_name, asset=get_region_asset(region_name))
+    return {'type': 'Feature', 'geometry': geometry.simplify(max_error).getInfo(), 'properties': {}}
+
+
+# Proyección de igual área (EASE-Grid 2.0, en metros) para las estadísticas: todos los píxeles cubren la misma
+# superficie, así el promedio simple de píxeles es un promedio por área, sin la distorsión de una grilla en grados
+STATS_CRS = 'EPSG:6933'
+
+
+# Promedio de todas las bandas: los píxeles de la imagen combinada se descargan en una grilla de scale metros en
+# STATS_CRS con una sola llamada a computePixels y se promedian localmente con NumPy; el resultado es un dict
+# y se guarda con cache_data (a 1000 m la provincia son unos 650 x 800 píxeles, ~10 MB en float32)
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_layer_means(region_name: str, start: str, end: str, scale: int = 1000):
+    data = get_all_data(region_name, start, end)
+    xmin, ymin, xmax, ymax = get_region_bounds(region_name, STATS_CRS)
+    pixels = ee.data.computePixels({
+        'expression': data['combined'].unmask(NODATA, False),
+        'fileFormat': 'NUMPY_NDARRAY',
+        'grid': {
+            'dimensions': {'width': math.ceil((xmax - xmin) / scale), 'height': math.ceil((ymax - ymin) / scale)},
+            'affineTransform': {'scaleX': scale, 'shearX': 0, 'translateX': xmin,
+                                'shearY': 0, 'scaleY': -scale, 'translateY': ymax},
+            'crsCode': STATS_CRS
         }
+    })
+    means = {}
+    for band in pixels.dtype.names:
+        values = pixels[band][pixels[band] != NODATA]
+        means[band] = float(values.mean()) if values.size else None
+    return means
+
+
+# Vida de las URL de getMapId: los mapid de EE caducan, así que pasado este tiempo se vuelven a pedir
+TILE_URL_TTL = 3600
+
+
+# URL de teselas ya pedidas, compartidas entre sesiones: {clave de tile_key: (url, hora)}
+# Se guardan fuera de st.cache_data para que prefetch_tile_urls pueda completarlas con hilos que no usan Streamlit
+@st.cache_resource(show_spinner=False)
+def tile_url_store():
+    return {}
+
+
+def tile_key(region_name, start, end, layer, vmin, vmax, palette):
+    return region_name, start, end, layer, float(vmin), float(vmax), tuple(palette)
+
+
+# Guardar una URL y descartar las caducadas, para que el diccionario no crezca con cada rango probado
+def store_tile_url(key, url):
+    store = tile_url_store()
+    now = time.monotonic()
+    for old_key, (_, created) in list(store.items()):
+        if now - created >= TILE_URL_TTL:
+            store.pop(old_key, None)
+    store[key] = (url, now)
+
+
+# URL guardada y vigente para una clave, o None
+def cached_tile_url(key):
+    entry = tile_url_store().get(key)
+    if entry and time.monotonic() - entry[1] < TILE_URL_TTL:
+        return entry[0]
+    return None
+
+
+# Pedir a EE la URL de teselas de una imagen con su rango y paleta (sin Streamlit: se usa también desde hilos)
+def mint_tile_url(image, vmin, vmax, palette):
+    map_id = image.getMapId({'min': vmin, 'max': vmax, 'palette': list(palette)})
+    return map_id['tile_fetcher'].url_format
+
+
+# URL de teselas de una capa: getMapId es una consulta a EE, así que se guarda por capa, rango y paleta
+# durante TILE_URL_TTL
+def get_tile_url(region_name: str, start: str, end: str, layer: str, vmin: float, vmax: float, palette: tuple):
+    key = tile_key(region_name, start, end, layer, vmin, vmax, palette)
+    url = cached_tile_url(key)
+    if url is None:
+        url = mint_tile_url(get_all_data(region_name, start, end)[layer], vmin, vmax, palette)
+        store_tile_url(key, url)
+    return url
+
+
+# Configuración de cada capa: clave en get_all_data, banda, mapa de colores de TiTiler (equivalente a la paleta),
+# rangos de los deslizadores, valores por defecto, paso, paleta y fórmula que se muestra en la barra lateral
+LAYER_CFG = {
+    "Índice IET": {
+        "key": 'iet', "band": 'IET', "colormap": 'rdylgn',
+        "min_range": (0.0, 0.5), "max_range": (0.5, 2.0), "default": (0.0, 1.0), "step": 0.01,
+        "palette": ('red', 'yellow', 'green'),
+        "info": "**Índice IET**: (NDMI + SAVI + EVI) / (1 + NDBI)"
+    },
+    "NDMI": {
+        "key": 'ndmi', "band": 'NDMI', "colormap": 'brbg',
+        "min_range": (-1.0, 0.0), "max_range": (0.0, 1.0), "default": (-1.0, 1.0), "step": 0.1,
+        "palette": ('brown', 'yellow', 'blue'),
+        "info": "**NDMI**: (B8 - B11) / (B8 + B11)"
+    },
+    "SAVI": {
+        "key": 'savi', "band": 'SAVI', "colormap": 'rdylgn',
+        "min_range": (-1.0, 0.0), "max_range": (0.0, 1.0), "default": (-1.0, 1.0), "step": 0.1,
+        "palette": ('brown', 'yellow', 'green'),
+        "info": "**SAVI**: (1 + L) * ((NIR - RED) / (NIR + RED + L)), L=0.5"
+    },
+    "EVI": {
+        "key": 'evi', "band": 'EVI', "colormap": 'rdylgn',
+        "min_range": (-1.0, 0.0), "max_range": (0.0, 1.0), "default": (-1.0, 1.0), "step": 0.1,
+        "palette": ('brown', 'yellow', 'green'),
+        "info": "**EVI**: 2.5 * ((NIR - RED) / (NIR + 6 * RED - 7.5 * BLUE + 1))"
+    },
+    "NDBI": {
+        "key": 'ndbi', "band": 'NDBI', "colormap": 'rdylgn_r',
+        "min_range": (-1.0, 0.0), "max_range": (0.0, 1.0), "default": (-1.0, 1.0), "step": 0.1,
+        "palette": ('green', 'yellow', 'gray'),
+        "info": "**NDBI**: (B11 - B8) / (B11 + B8)"
+    }
+}
+
+
+# Pedir en paralelo las URL de teselas que falten o hayan caducado de todas las capas con su rango por defecto,
+# así cambiar de capa no espera a getMapId. Se espera a que terminen (casi lo mismo que pedir solo la capa elegida,
+# que suele ser una de ellas); los hilos solo llaman a getMapId y las URL se guardan desde este hilo.
+# Si alguna falla, no se guarda y se vuelve a pedir al elegir esa capa
+def prefetch_tile_urls(region_name: str, start: str, end: str):
+    data = get_all_data(region_name, start, end)
+    missing = {}
+    for cfg in LAYER_CFG.values():
+        key = tile_key(region_name, start, end, cfg['key'], *cfg['default'], cfg['palette'])
+        if cached_tile_url(key) is None:
+            missing[key] = (data[cfg['key']], *cfg['default'], cfg['palette'])
+    if not missing:
+        return
 
-    except Exception as e:
-        st.error(f"Error obteniendo datos de GEE: {e}")
+    with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+        futures = {key: executor.submit(mint_tile_url, *args) for key, args in missing.items()}
+    for key, future in futures.items():
+        if future.exception() is None:
+            store_tile_url(key, future.result())
+
+
+# Comprobar con una petición HEAD que el COG existe; se guarda unos minutos para no repetirla en cada ejecución
+# Las URL que no son http(s) (p. ej. gs://) las resuelve TiTiler y se dan por válidas
+@st.cache_data(ttl=600, show_spinner=False)
+def cog_available(cog_url: str) -> bool:
+    if not cog_url.startswith(('http://', 'https://')):
+        return True
+    try:
+        with urlopen(Request(cog_url, method='HEAD'), timeout=5) as response:
+            return response.status < 400
+    except Exception:
+        return False
+
+
+# Servidor TiTiler y URL del COG desde st.secrets; None si no están configurados o el COG no responde
+# (404 u otro error), en cuyo caso se usan las teselas de EE
+def get_cog_source():
+    try:
+        endpoint, cog_url = st.secrets["TITILER_ENDPOINT"].rstrip('/'), st.secrets["IET_COG_URL"]
+    except Exception:
+        return None
+    return (endpoint, cog_url) if cog_available(cog_url) else None
+
+
+# URL de teselas de una banda del COG (bidx = posición en COG_BANDS + 1); el rango y los colores los aplica TiTiler,
+# sin cálculo en EE
+def cog_tile_url(cog_source, band: str, vmin: float, vmax: float, colormap: str):
+    endpoint, cog_url = cog_source
+    query = urlencode({
+        'url': cog_url,
+        'bidx': COG_BANDS.index(band) + 1,
+        'rescale': f"{vmin},{vmax}",
+        'colormap_name': colormap,
+        # Transparente fuera de la región, como en las teselas de EE
+        'nodata': NODATA
+    })
+    return f"{endpoint}/cog/tiles/WebMercatorQuad/{{z}}/{{x}}/{{y}}?{query}"
+
+
+# Proxy o CDN para las teselas de EE (opcional, secret TILE_PROXY_URL): debe reenviar la ruta a
+# earthengine.googleapis.com y guardar las respuestas en caché; None si no está configurado
+EE_TILE_HOST = 'https://earthengine.googleapis.com'
+
+
+def get_tile_proxy():
+    try:
+        return st.secrets["TILE_PROXY_URL"].rstrip('/')
+    except Exception:
         return None
 
 
+# URL y atribución de las teselas de una capa: desde el COG precalculado si hay TiTiler configurado,
+# si no desde Earth Engine (la URL de getMapId está en caché), a través del proxy si hay uno
+def layer_tiles(layer_name: str, vmin: float, vmax: float, cog_source=None, tile_proxy=None):
+    cfg = LAYER_CFG[layer_name]
+    if cog_source:
+        return cog_tile_url(cog_source, cfg['band'], vmin, vmax, cfg['colormap']), 'Google Earth Engine / TiTiler'
+    tile_url = get_tile_url(REGION_NAME, START_DATE, END_DATE, cfg['key'], vmin, vmax, cfg['palette'])
+    if tile_proxy:
+        tile_url = tile_url.replace(EE_TILE_HOST, tile_proxy, 1)
+    return tile_url, 'Google Earth Engine'
+
+
+# Construir el mapa de una capa y devolverlo como HTML; se guarda en caché por capa y URL de teselas,
+# así en las siguientes ejecuciones no se vuelve a crear el mapa ni a evaluar las plantillas de folium
+# La URL es parte de la clave: cuando el mapid de EE caduca y get_tile_url devuelve uno nuevo, el mapa se
+# vuelve a construir y nunca se sirve HTML con un mapid vencido
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_map_html(layer_name: str, tile_url: str, attr: str):
+    import folium
+    import geemap.foliumap as geemap
+
+    # Crear el mapa (Earth Engine ya está inicializado) sin los complementos que no se usan
+    # (dibujo, pantalla completa y buscador), que agregan scripts y estilos al HTML
+    m = geemap.Map(
+        center=[-31.4, -64.2],
+        zoom=7,
+        plugin_Draw=False,
+        plugin_Fullscreen=False,
+        search_control=False,
+        ee_initialize=False
+    )
+
+    # Añadir la capa como teselas (ver layer_tiles)
+    folium.raster_layers.TileLayer(
+        tiles=tile_url,
+        attr=attr,
+        name=layer_name,
+        overlay=True,
+        control=True
+    ).add_to(m)
+
+    # Añadir la región de Buenos Aires como contorno; se dibuja en el navegador a partir del GeoJSON en caché
+    folium.GeoJson(
+        get_region_geojson(REGION_NAME),
+        name='Límites Buenos Aires',
+        style_function=lambda feature: {'color': 'black', 'weight': 2, 'fillOpacity': 0}
+    ).add_to(m)
+
+    # Añadir control de capas
+    m.addLayerControl()
+
+    return m.get_root().render()
+
+
+# Colores de los mapas de colores de TiTiler usados en LAYER_CFG (muestras de los de matplotlib);
+# el sufijo _r invierte el orden
+COLORMAP_COLORS = {
+    'rdylgn': ('#a50026', '#f46d43', '#ffffbf', '#66bd63', '#006837'),
+    'brbg': ('#543005', '#bf812d', '#f5f5f5', '#35978f', '#003c30')
+}
+
+
+# Colores de la leyenda: los del mapa de colores de TiTiler si las teselas salen del COG, si no la paleta de EE
+def legend_colors(cfg, cog_source=None):
+    if not cog_source:
+        return cfg['palette']
+    name = cfg['colormap']
+    if name.endswith('_r'):
+        return COLORMAP_COLORS[name[:-2]][::-1]
+    return COLORMAP_COLORS[name]
+
+
+# Leyenda de la capa como degradado CSS con los mismos colores y rango que las teselas (sin consultas a EE)
+def legend_html(palette: tuple, vmin: float, vmax: float):
+    return f"""
+    <div style="width: 220px; font-size: 0.8rem;">
+        <div style="height: 12px; background: linear-gradient(to right, {', '.join(palette)});"></div>
+        <div style="display: flex; justify-content: space-between;"><span>{vmin:g}</span><span>{vmax:g}</span></div>
+    </div>
+    """
+
+
+# Texto del desplegable "Información sobre los índices"; solo se completa el nombre de la capa
+INFO_MD = """
+**{capa}**:
+**Interpretación**:
+- 🟢 **Valores altos**: Mejor condición ambiental
+- 🟡 **Valores medios**: Condición moderada  
+- 🔴 **Valores bajos**: Peor condición ambiental
+
+**Período**: Enero - Diciembre 2023
+**Fuentes**: Sentinel-2, CHIRPS, ESA WorldCover
+"""
+
+
 # Crear la interfaz de la aplicación
 def main():
     st.sidebar.title("⚙️ Opciones de Visualización")
     
-    # Inicializar Earth Engine
-    if not initialize_ee():
-        st.warning("""
-        ⚠️ No se pudo inicializar Earth Engine automáticamente.
-        La aplicación podría no funcionar correctamente en Streamlit Cloud.
-        """)
-        return
-    
     # Selector de capas
     capa_seleccionada = st.sidebar.selectbox(
         "Selecciona la capa a visualizar:",
-        ["Índice IET", "NDMI", "SAVI", "EVI", "NDBI"]
+        list(LAYER_CFG)
     )
 
     
     # Opciones de visualización
     st.sidebar.subheader("Ajustes de Visualización")
     
-    # Crear el mapa
-    m = geemap.Map(
-        center=[-31.4, -64.2], 
-        zoom=7,
-        draw_export=False
-    )
-    # Configuración de paletas y rangos según la capa
-    if capa_seleccionada == "Índice IET":
-        min_val = st.sidebar.slider("Valor mínimo", 0.0, 0.5, 0.0, 0.01)
-        max_val = st.sidebar.slider("Valor máximo", 0.5, 2.0, 1.0, 0.01)
-        palette = ['red', 'yellow', 'green']
-    elif capa_seleccionada == "NDMI":
-        min_val = st.sidebar.slider("Valor mínimo", -1.0, 0.0, -1.0, 0.1)
-        max_val = st.sidebar.slider("Valor máximo", 0.0, 1.0, 1.0, 0.1)
-        palette = ['brown', 'yellow', 'blue']
-    elif capa_seleccionada == "SAVI":
-        min_val = st.sidebar.slider("Valor mínimo", -1.0, 0.0, -1.0, 0.1)
-        max_val = st.sidebar.slider("Valor máximo", 0.0, 1.0, 1.0, 0.1)
-        palette = ['brown', 'yellow', 'green']
-    elif capa_seleccionada == "EVI":
-        min_val = st.sidebar.slider("Valor mínimo", -1.0, 0.0, -1.0, 0.1)
-        max_val = st.sidebar.slider("Valor máximo", 0.0, 1.0, 1.0, 0.1)
-        palette = ['brown', 'yellow', 'green']
-    elif capa_seleccionada == "NDBI":
-        min_val = st.sidebar.slider("Valor mínimo", -1.0, 0.0, -1.0, 0.1)
-        max_val = st.sidebar.slider("Valor máximo", 0.0, 1.0, 1.0, 0.1)
-        palette = ['green', 'yellow', 'gray']
-    else:
-        # Valores por defecto si ninguna capa coincide
-        min_val = 0
-        max_val = 1
-        palette = ['blue', 'green', 'red']
-
-    # Configurar parámetros de visualización
-    vis_params = {
-        'min': min_val,
-        'max': max_val,
-        'palette': palette
-    }
+    # Rangos de los deslizadores según la capa (tabla LAYER_CFG)
+    # Los deslizadores van en un formulario: mover ambos y aplicar genera una sola ejecución y un solo mapa nuevo
+    cfg = LAYER_CFG[capa_seleccionada]
+    with st.sidebar.form('vis_form'):
+        min_val = st.slider("Valor mínimo", *cfg['min_range'], cfg['default'][0], cfg['step'])
+        max_val = st.slider("Valor máximo", *cfg['max_range'], cfg['default'][1], cfg['step'])
+        st.form_submit_button('Aplicar cambios')
+
+    # Fórmula de la capa seleccionada
+    st.sidebar.info(cfg['info'])
+
+    # Inicializar Earth Engine después de dibujar la barra lateral, que ya se ve y se puede usar mientras tanto
+    # (en caché; solo se reintenta si falló)
+    with st.spinner('Conectando con Google Earth Engine...'):
+        ee_ready = initialize_ee()
+    if not ee_ready:
+        initialize_ee.clear()
+        st.warning("""
+        ⚠️ No se pudo inicializar Earth Engine automáticamente.
+        La aplicación podría no funcionar correctamente en Streamlit Cloud.
+        """)
+        return
 
     try:
         with st.spinner('Cargando datos desde Google Earth Engine...'):
-            # Obtener TODOS los datos una sola vez
-            data = get_all_data()
-            
-            if data is None:
+            # Obtener TODOS los datos una sola vez (en caché entre ejecuciones)
+            try:
+                data = get_all_data(REGION_NAME, START_DATE, END_DATE)
+            except Exception as e:
+                st.error(f"Error obteniendo datos de GEE: {e}")
                 st.error("No se pudieron cargar los datos. Intenta recargar la página.")
                 return
             
-            # Añadir capa según selección (usando los datos ya calculados)
-            if capa_seleccionada == "Índice IET":
-                m.addLayer(data['iet'], vis_params, 'Índice IET')
-                st.sidebar.info("**Índice IET**: (NDMI + SAVI + EVI) / (1 + NDBI)")
-                
-            elif capa_seleccionada == "NDMI":
-                m.addLayer(data['ndmi'], vis_params, 'NDMI')
-                st.sidebar.info("**NDMI**: (B8 - B11) / (B8 + B11)")
-
-            elif capa_seleccionada == "SAVI":
-                m.addLayer(data['savi'], vis_params, 'SAVI')
-                st.sidebar.info("**SAVI**: (1 + L) * ((NIR - RED) / (NIR + RED + L)), L=0.5")
-
-            elif capa_seleccionada == "EVI":
-                m.addLayer(data['evi'], vis_params, 'EVI')
-                st.sidebar.info("**EVI**: 2.5 * ((NIR - RED) / (NIR + 6 * RED - 7.5 * BLUE + 1))")
-            
-            elif capa_seleccionada == "NDBI":
-                m.addLayer(data['ndbi'], vis_params, 'NDBI')
-                st.sidebar.info("**NDBI**: (B11 - B8) / (B11 + B8)")
-            
-            # Añadir la región de Buenos Aires como contorno
-            m.addLayer(data['region'].style(**{'color': 'black', 'fillColor': '00000000'}), {}, 'Límites Buenos Aires')
-            
-            # Añadir control de capas
-            m.addLayerControl()
+            # Con teselas de EE, pedir juntas las URL de todas las capas que falten
+            cog_source = get_cog_source()
+            if cog_source is None:
+                prefetch_tile_urls(REGION_NAME, START_DATE, END_DATE)
+
+            # Mapa renderizado a HTML una vez por capa y URL de teselas (en caché)
+            tile_url, attr = layer_tiles(capa_seleccionada, min_val, max_val, cog_source, get_tile_proxy())
+            map_html = build_map_html(capa_seleccionada, tile_url, attr)
             
         # Mostrar el mapa en Streamlit
         st.subheader(f"🗺️ Mapa de {capa_seleccionada} - Buenos Aires 2023")
@@ -268,64 +492,22 @@ def main():
         # Mostrar información estadística básica
         with st.expander("📈 Información estadística"):
             try:
-                if capa_seleccionada == "Índice IET":
-                    stats = data['iet'].reduceRegion(
-                        reducer=ee.Reducer.mean(),
-                        geometry=data['region'].geometry(),
-                        scale=1000
-                    ).getInfo()
-                    st.write(f"Valor promedio IET: {stats.get('IET', 'N/A'):.4f}")
-                    
-                elif capa_seleccionada == "NDMI":
-                    stats = data['ndmi'].reduceRegion(
-                        reducer=ee.Reducer.mean(),
-                        geometry=data['region'].geometry(),
-                        scale=1000
-                    ).getInfo()
-                    st.write(f"Valor promedio NDMI: {stats.get('NDMI', 'N/A'):.4f}")
-                
-                elif capa_seleccionada == "SAVI":
-                    stats = data['savi'].reduceRegion(
-                        reducer=ee.Reducer.mean(),
-                        geometry=data['region'].geometry(),
-                        scale=1000
-                    ).getInfo()
-                    st.write(f"Valor promedio SAVI: {stats.get('SAVI', 'N/A'):.4f}")
-                
-                elif capa_seleccionada == "EVI":
-                    stats = data['evi'].reduceRegion(
-                        reducer=ee.Reducer.mean(),
-                        geometry=data['region'].geometry(),
-                        scale=1000
-                    ).getInfo()
-                    st.write(f"Valor promedio EVI: {stats.get('EVI', 'N/A'):.4f}")
-
-                elif capa_seleccionada == "NDBI":
-                    stats = data['ndbi'].reduceRegion(
-                        reducer=ee.Reducer.mean(),
-                        geometry=data['region'].geometry(),
-                        scale=1000
-                    ).getInfo()
-                    st.write(f"Valor promedio NDBI: {stats.get('NDBI', 'N/A'):.4f}")
-                    
+                # Promedios de las cinco capas en una sola consulta (en caché); aquí solo se busca la banda
+                stats = get_layer_means(REGION_NAME, START_DATE, END_DATE)
+                band = cfg['band']
+                value = stats.get(band)
+                st.write(f"Valor promedio {band}: {value:.4f}" if value is not None else f"Valor promedio {band}: N/A")
+
             except Exception as e:
                 st.write("No se pudieron calcular estadísticas en este momento")
         
         # Mostrar el mapa
-        m.to_streamlit(height=600)
+        components.html(map_html, height=600)
 
         # Información adicional
         with st.expander("📊 Información sobre los índices"):
-            st.markdown(f"""
-            **{capa_seleccionada}**:
-            **Interpretación**:
-            - 🟢 **Valores altos**: Mejor condición ambiental
-            - 🟡 **Valores medios**: Condición moderada  
-            - 🔴 **Valores bajos**: Peor condición ambiental
-            
-            **Período**: Enero - Diciembre 2023
-            **Fuentes**: Sentinel-2, CHIRPS, ESA WorldCover
-            """)
+            st.markdown(INFO_MD.format(capa=capa_seleccionada))
+            st.html(legend_html(legend_colors(cfg, cog_source), min_val, max_val))
             
     except Exception as e:
         st.error(f"❌ Error al generar el mapa: {str(e)}")
@@ -0,0 +1,16 @@
+"""
+Tipos reducidos de las series de time-series_data, sin Streamlit: lo usan graficos.py al leer los CSV
+y tools/convert_csvs.py al generar los Parquet, así ambos caminos dan exactamente los mismos tipos.
+"""
+import pandas as pd
+
+
+# Tipos de las series: años válidos como uint16 y porcentajes como float32
+def reduce_dtypes(data):
+    # Convertir los años de forma vectorizada; se descartan las filas sin año válido (p. ej. líneas vacías)
+    data["year"] = pd.to_numeric(data["year"], errors="coerce")
+    data = data.dropna(subset=["year"])
+    data = data.astype({"year": "uint16"})
+    for column in data.columns.drop("year"):
+        data[column] = pd.to_numeric(data[column], downcast="float")
+    return data
@@ -0,0 +1,30 @@
+"""
+Convierte las series de time-series_data/*.csv a Parquet con tipos reducidos.
+graficos.py lee el Parquet cuando existe y está al día, y vuelve al CSV si falta o es más viejo que el CSV.
+Volver a ejecutar después de modificar algún CSV:
+
+    python tools/convert_csvs.py
+"""
+import sys
+import pandas as pd
+from pathlib import Path
+
+# Los tipos se reducen con el mismo código que usa graficos.py al leer los CSV
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from series_dtypes import reduce_dtypes
+
+# Carpeta con las series temporales consolidadas
+DATA_DIR = Path(__file__).resolve().parent.parent / "time-series_data"
+
+
+# Años como uint16 y porcentajes como float32 (series_dtypes.reduce_dtypes)
+def convert(csv_file):
+    data = reduce_dtypes(pd.read_csv(csv_file))
+    parquet = csv_file.with_suffix(".parquet")
+    data.to_parquet(parquet, compression="zstd", index=False)
+    return parquet
+
+
+if __name__ == "__main__":
+    for csv_file in sorted(DATA_DIR.glob("*.csv")):
+        print(f"{csv_file.name} -> {convert(csv_file).name}")
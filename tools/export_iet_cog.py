@@ -0,0 +1,55 @@
+"""
+Exporta la imagen de índices de indices_ee.py (NDMI, SAVI, EVI, NDBI e IET) a Cloud Storage como COG.
+Con los secrets TITILER_ENDPOINT e IET_COG_URL configurados, mapas.py sirve las teselas desde ese
+archivo a través de TiTiler en lugar de pedirlas a Earth Engine. Ejecutar una vez (requiere
+`earthengine authenticate` y permiso de escritura en el bucket):
+
+    python tools/export_iet_cog.py <bucket> [--project <proyecto>]
+
+Al terminar la tarea, configurar IET_COG_URL con la URL pública del archivo, por ejemplo
+https://storage.googleapis.com/<bucket>/iet_buenos_aires_2023.tif
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import ee
+
+# La imagen se construye con el mismo módulo que usa mapas.py, para que el COG coincida con las capas de EE
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from indices_ee import COG_BANDS, END_DATE, NODATA, REGION_NAME, START_DATE, build_combined, region_collection
+
+# Nombre del archivo en el bucket (sin extensión)
+FILE_PREFIX = "iet_buenos_aires_2023"
+
+
+def export(bucket, scale=30):
+    region, geometry = region_collection(REGION_NAME)
+    task = ee.batch.Export.image.toCloudStorage(
+        image=build_combined(region, START_DATE, END_DATE).select(COG_BANDS),
+        description=FILE_PREFIX,
+        bucket=bucket,
+        fileNamePrefix=FILE_PREFIX,
+        region=geometry,
+        scale=scale,
+        crs='EPSG:3857',
+        maxPixels=1e13,
+        fileFormat='GeoTIFF',
+        # Los píxeles enmascarados (fuera de la región o nubes) se escriben como NODATA y se marcan así en el archivo
+        formatOptions={'cloudOptimized': True, 'noData': NODATA}
+    )
+    task.start()
+    return task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("bucket", help="bucket de Cloud Storage de destino")
+    parser.add_argument("--project", help="proyecto de Google Cloud para Earth Engine")
+    parser.add_argument("--scale", type=int, default=30, help="resolución en metros (por defecto 30)")
+    args = parser.parse_args()
+
+    ee.Initialize(project=args.project)
+    task = export(args.bucket, args.scale)
+    print(f"Tarea {task.id} iniciada: gs://{args.bucket}/{FILE_PREFIX}.tif")
+    print("Seguir su estado en https://code.earthengine.google.com/tasks")
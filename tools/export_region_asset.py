@@ -0,0 +1,45 @@
+"""
+Guarda el contorno de la región de indices_ee.py (filtrado de FAO/GAUL) como asset propio de Earth Engine,
+para que la aplicación lo lea directamente en lugar de filtrar GAUL en cada cálculo. Ejecutar una vez
+(requiere `earthengine authenticate`):
+
+    python tools/export_region_asset.py <assetId> [--project <proyecto>]
+
+Al terminar la tarea, agregar el asset a st.secrets:
+
+    [EE_REGION_ASSETS]
+    "Buenos Aires" = "<assetId>"
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import ee
+
+# El contorno se obtiene con el mismo filtro que usa la aplicación
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from indices_ee import REGION_NAME, region_collection
+
+
+def export(asset_id, region_name=REGION_NAME):
+    region, _ = region_collection(region_name)
+    task = ee.batch.Export.table.toAsset(
+        collection=region,
+        description=f"region_{region_name.lower().replace(' ', '_')}",
+        assetId=asset_id
+    )
+    task.start()
+    return task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("asset_id", help="assetId de destino, p. ej. projects/<proyecto>/assets/buenos_aires")
+    parser.add_argument("--project", help="proyecto de Google Cloud para Earth Engine")
+    parser.add_argument("--region", default=REGION_NAME, help=f"región de GAUL nivel 1 (por defecto {REGION_NAME})")
+    args = parser.parse_args()
+
+    ee.Initialize(project=args.project)
+    task = export(args.asset_id, args.region)
+    print(f"Tarea {task.id} iniciada: {args.asset_id}")
+    print("Seguir su estado en https://code.earthengine.google.com/tasks")